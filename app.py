@@ -2,17 +2,20 @@ from flask import Flask, request, render_template, jsonify, send_file
 import os
 from werkzeug.utils import secure_filename
 import pandas as pd
-from utils.image_processor import extract_table_from_image
-from utils.chart_detector import detect_chart_type, extract_data_from_chart
-from utils.visual_generator import generate_visualizations
+from utils.pipeline import process_table_file, process_chart_file, process_page_file
+from utils.executor import run_cpu_bound, ExecutorBusy
+from utils.memory import ImageMemoryError
+import asyncio
 import json
 from datetime import datetime
+from uuid import uuid4
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['OUTPUT_FOLDER'] = 'outputs'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 app.config['ALLOWED_EXTENSIONS'] = {'png', 'jpg', 'jpeg', 'pdf'}
+app.config['PROCESSING_TIMEOUT'] = int(os.environ.get('PROCESSING_TIMEOUT', 110))  # seconds per request
 
 # Create necessary folders
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -33,96 +36,70 @@ def upload_table_page():
 def upload_chart_page():
     return render_template('upload_chart.html')
 
-@app.route('/process-table', methods=['POST'])
-def process_table():
-    try:
-        if 'image' not in request.files:
-            return jsonify({'error': 'No file uploaded'}), 400
-        
-        file = request.files['image']
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-        
-        if not allowed_file(file.filename):
-            return jsonify({'error': 'Invalid file format. Use PNG, JPG, or PDF'}), 400
-        
-        # Save uploaded file
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{timestamp}_{filename}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
-        # Extract table data from image
-        df = extract_table_from_image(filepath)
-        
-        if df is None or df.empty:
-            return jsonify({'error': 'Could not extract data from image'}), 400
-        
-        # Generate visualizations
-        charts = generate_visualizations(df, timestamp)
-        
-        # Prepare response
-        response = {
-            'success': True,
-            'data': df.to_dict('records'),
-            'columns': df.columns.tolist(),
-            'charts': charts,
-            'table_html': df.to_html(classes='table table-striped', index=False)
-        }
-        
-        return jsonify(response)
+def upload_error(files, field):
+    """Validation message for the uploaded file in files[field], or None"""
+    if field not in files:
+        return 'No file uploaded'
     
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    file = files[field]
+    if not getattr(file, 'filename', ''):
+        return 'No file selected'
+    
+    if not allowed_file(file.filename):
+        return 'Invalid file format. Use PNG, JPG, or PDF'
+    
+    return None
 
-@app.route('/process-chart', methods=['POST'])
-def process_chart():
+def upload_path(original_filename):
+    """Unique timestamped path in the upload folder for an uploaded file"""
+    filename = secure_filename(original_filename)
+    # The random suffix keeps requests in the same second from sharing outputs
+    timestamp = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid4().hex[:8]}"
+    filename = f"{timestamp}_{filename}"
+    return os.path.join(app.config['UPLOAD_FOLDER'], filename), timestamp
+
+async def run_pipeline(job, filepath, timestamp):
+    """Run a utils.pipeline job on the process pool; returns (body, status)"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + app.config['PROCESSING_TIMEOUT']
+    
     try:
-        if 'chart' not in request.files:
-            return jsonify({'error': 'No file uploaded'}), 400
-        
-        file = request.files['chart']
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-        
-        if not allowed_file(file.filename):
-            return jsonify({'error': 'Invalid file format. Use PNG, JPG, or PDF'}), 400
-        
-        # Save uploaded file
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{timestamp}_{filename}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
-        # Detect chart type
-        chart_type = detect_chart_type(filepath)
-        
-        # Extract data from chart
-        df = extract_data_from_chart(filepath, chart_type)
-        
-        if df is None or df.empty:
-            return jsonify({'error': 'Could not extract data from chart'}), 400
-        
-        # Save as CSV
-        csv_filename = f"{timestamp}_extracted_data.csv"
-        csv_path = os.path.join(app.config['OUTPUT_FOLDER'], csv_filename)
-        df.to_csv(csv_path, index=False)
-        
-        response = {
-            'success': True,
-            'chart_type': chart_type,
-            'data': df.to_dict('records'),
-            'columns': df.columns.tolist(),
-            'table_html': df.to_html(classes='table table-striped', index=False),
-            'csv_file': csv_filename
-        }
-        
-        return jsonify(response)
+        body = await run_cpu_bound(job, filepath, timestamp, app.config['OUTPUT_FOLDER'], deadline=deadline)
+        return body, 400 if 'error' in body else 200
     
+    except ImageMemoryError as e:
+        return {'error': str(e)}, 413
+    except ExecutorBusy as e:
+        return {'error': str(e)}, 503
+    except asyncio.TimeoutError:
+        return {'error': 'Processing took too long, try a smaller image'}, 504
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return {'error': str(e)}, 500
+
+async def process_upload(field, job):
+    error = upload_error(request.files, field)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    # Save uploaded file
+    file = request.files[field]
+    filepath, timestamp = upload_path(file.filename)
+    file.save(filepath)
+    
+    body, status = await run_pipeline(job, filepath, timestamp)
+    return jsonify(body), status
+
+@app.route('/process-table', methods=['POST'])
+async def process_table():
+    return await process_upload('image', process_table_file)
+
+@app.route('/process-chart', methods=['POST'])
+async def process_chart():
+    return await process_upload('chart', process_chart_file)
+
+@app.route('/process-page', methods=['POST'])
+async def process_page():
+    return await process_upload('page', process_page_file)
 
 @app.route('/download/<filename>')
 def download_file(filename):
@@ -0,0 +1,74 @@
+import os
+import shutil
+
+from asgiref.wsgi import WsgiToAsgi
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+
+from app import app, upload_error, upload_path, run_pipeline
+from utils.pipeline import process_table_file, process_chart_file, process_page_file
+
+# ASGI entry point. The upload endpoints are native async routes: the body is
+# parsed on the event loop and the OCR/chart work is awaited on the process
+# pool in utils.executor, so one process serves many uploads at once. Page
+# rendering and downloads are passed through to the Flask app.
+#
+#   uvicorn asgi:asgi_app --host 0.0.0.0 --port 5000
+
+
+def json_response(body, status=200):
+    # Flask's encoder, so both fronts return identical JSON
+    return Response(app.json.dumps(body), status_code=status, media_type='application/json')
+
+
+def save_upload(source, filepath):
+    with open(filepath, 'wb') as f:
+        shutil.copyfileobj(source, f)
+
+
+async def process_upload(request, field, job):
+    max_size = app.config['MAX_CONTENT_LENGTH']
+    if int(request.headers.get('content-length') or 0) > max_size:
+        return json_response({'error': 'File too large'}, 413)
+
+    form = await request.form()
+    try:
+        error = upload_error(form, field)
+        if error:
+            return json_response({'error': error}, 400)
+
+        # Save uploaded file
+        file = form[field]
+        filepath, timestamp = upload_path(file.filename)
+        await run_in_threadpool(save_upload, file.file, filepath)
+    finally:
+        await form.close()
+
+    if os.path.getsize(filepath) > max_size:
+        os.remove(filepath)
+        return json_response({'error': 'File too large'}, 413)
+
+    body, status = await run_pipeline(job, filepath, timestamp)
+    return json_response(body, status)
+
+
+async def process_table(request):
+    return await process_upload(request, 'image', process_table_file)
+
+
+async def process_chart(request):
+    return await process_upload(request, 'chart', process_chart_file)
+
+
+async def process_page(request):
+    return await process_upload(request, 'page', process_page_file)
+
+
+asgi_app = Starlette(routes=[
+    Route('/process-table', process_table, methods=['POST']),
+    Route('/process-chart', process_chart, methods=['POST']),
+    Route('/process-page', process_page, methods=['POST']),
+    Mount('/', app=WsgiToAsgi(app)),
+])
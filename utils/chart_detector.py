@@ -1,17 +1,18 @@
 import cv2
 import numpy as np
 import pandas as pd
-from PIL import Image
 import pytesseract
 import re
+from utils.image_loader import load_image, load_pil_image
+from utils.memory import ImageMemoryError, record_stage
 
 def detect_chart_type(image_path):
     """Detect the type of chart in the image"""
-    img = cv2.imread(image_path)
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    gray = load_image(image_path, grayscale=True)
     
     # Edge detection
     edges = cv2.Canny(gray, 50, 150)
+    record_stage('edges', gray, edges)
     
     # Detect lines (for bar charts, line charts)
     lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=100, minLineLength=50, maxLineGap=10)
@@ -56,11 +57,11 @@ def extract_data_from_chart(image_path, chart_type):
 def extract_bar_chart_data(image_path):
     """Extract data from bar chart"""
     try:
-        img = cv2.imread(image_path)
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        gray = load_image(image_path, grayscale=True)
         
-        # Detect vertical bars
-        _, thresh = cv2.threshold(gray, 200, 255, cv2.THRESH_BINARY_INV)
+        # Detect vertical bars (threshold in place, gray is not needed afterwards)
+        _, thresh = cv2.threshold(gray, 200, 255, cv2.THRESH_BINARY_INV, dst=gray)
+        record_stage('threshold', thresh)
         contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
         # Filter contours that look like bars
@@ -99,6 +100,8 @@ def extract_bar_chart_data(image_path):
         
         return create_sample_bar_data()
     
+    except ImageMemoryError:
+        raise
     except Exception as e:
         print(f"Error extracting bar chart: {e}")
         return create_sample_bar_data()
@@ -106,11 +109,11 @@ def extract_bar_chart_data(image_path):
 def extract_line_chart_data(image_path):
     """Extract data from line chart"""
     try:
-        img = cv2.imread(image_path)
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        gray = load_image(image_path, grayscale=True)
         
         # Edge detection
         edges = cv2.Canny(gray, 50, 150)
+        record_stage('edges', gray, edges)
         
         # Find the main line
         contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -149,6 +152,8 @@ def extract_line_chart_data(image_path):
         
         return create_sample_line_data()
     
+    except ImageMemoryError:
+        raise
     except Exception as e:
         print(f"Error extracting line chart: {e}")
         return create_sample_line_data()
@@ -156,7 +161,7 @@ def extract_line_chart_data(image_path):
 def extract_pie_chart_data(image_path):
     """Extract data from pie chart"""
     try:
-        img = cv2.imread(image_path)
+        img = load_image(image_path, grayscale=True)
         
         # Try to extract labels and percentages using OCR
         text_data = pytesseract.image_to_string(img)
@@ -175,6 +180,8 @@ def extract_pie_chart_data(image_path):
         
         return create_sample_pie_data()
     
+    except ImageMemoryError:
+        raise
     except Exception as e:
         print(f"Error extracting pie chart: {e}")
         return create_sample_pie_data()
@@ -182,7 +189,7 @@ def extract_pie_chart_data(image_path):
 def extract_axis_labels(image_path, axis='x'):
     """Extract axis labels using OCR"""
     try:
-        img = cv2.imread(image_path)
+        img = load_image(image_path, grayscale=True)
         height, width = img.shape[:2]
         
         # Crop to get axis region
@@ -199,13 +206,15 @@ def extract_axis_labels(image_path, axis='x'):
         
         return labels[:10]  # Return max 10 labels
     
+    except ImageMemoryError:
+        raise
     except:
         return []
 
 def extract_generic_data(image_path):
     """Generic data extraction using OCR for unknown chart types"""
     try:
-        img = Image.open(image_path)
+        img = load_pil_image(image_path)
         text = pytesseract.image_to_string(img)
         
         # Try to find numerical values
@@ -222,24 +231,33 @@ def extract_generic_data(image_path):
         
         return create_sample_bar_data()
     
+    except ImageMemoryError:
+        raise
     except Exception as e:
         print(f"Error in generic extraction: {e}")
         return create_sample_bar_data()
 
 def create_sample_bar_data():
-    return pd.DataFrame({
+    df = pd.DataFrame({
         'Category': ['A', 'B', 'C', 'D', 'E'],
         'Value': [45, 72, 38, 91, 55]
     })
+    # Lets batch callers tell placeholder data from a real extraction
+    df.attrs['placeholder'] = True
+    return df
 
 def create_sample_line_data():
-    return pd.DataFrame({
+    df = pd.DataFrame({
         'X': ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun'],
         'Y': [30, 45, 38, 65, 52, 70]
     })
+    df.attrs['placeholder'] = True
+    return df
 
 def create_sample_pie_data():
-    return pd.DataFrame({
+    df = pd.DataFrame({
         'Category': ['Category A', 'Category B', 'Category C', 'Category D'],
         'Percentage': [30, 25, 25, 20]
-    })
\ No newline at end of file
+    })
+    df.attrs['placeholder'] = True
+    return df
\ No newline at end of file
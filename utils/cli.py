@@ -0,0 +1,231 @@
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from utils.image_processor import extract_table_from_image
+from utils.chart_detector import detect_chart_type, extract_data_from_chart
+from utils.layout_analyzer import extract_page
+from utils.memory import ImageMemoryError
+
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg'}
+
+CHECKPOINT_NAME = '.data-converter-checkpoint.json'
+
+
+class ExtractionFailed(Exception):
+    """Raised when an extractor fell back to placeholder data"""
+
+
+def find_images(input_path):
+    """List images under a directory, or the paths listed in a manifest file"""
+    if os.path.isdir(input_path):
+        images = []
+        for root, dirs, files in os.walk(input_path):
+            dirs.sort()
+            for name in sorted(files):
+                if '.' in name and name.rsplit('.', 1)[1].lower() in IMAGE_EXTENSIONS:
+                    images.append(os.path.join(root, name))
+        return images
+
+    # Manifest: one image path per line, relative to the manifest's folder
+    base = os.path.dirname(os.path.abspath(input_path))
+    with open(input_path) as f:
+        lines = [line.strip() for line in f]
+    return [os.path.join(base, line) for line in lines if line and not line.startswith('#')]
+
+
+def file_hash(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable checkpoint {path}: {e}")
+        return {}
+
+
+def save_checkpoint(path, checkpoint):
+    """Write the checkpoint atomically so an interrupted run never corrupts it"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def is_done(entry, digest, mode, fmt):
+    """True if a checkpoint entry shows this exact file was already converted"""
+    return (entry is not None and entry.get('status') in ('ok', 'empty') and entry.get('hash') == digest
+            and entry.get('mode') == mode and entry.get('format') == fmt
+            and all(os.path.exists(out) for out in entry.get('outputs', [])))
+
+
+def is_placeholder(df):
+    """True for the sample data the extractors return when extraction fails"""
+    return bool(df.attrs.get('placeholder'))
+
+
+def write_table(df, out_base, fmt):
+    out_path = f'{out_base}.{fmt}'
+    if fmt == 'parquet':
+        df.columns = [str(col) for col in df.columns]
+        df.to_parquet(out_path, index=False)
+    else:
+        df.to_csv(out_path, index=False)
+    return out_path
+
+
+def convert_file(job):
+    """Extract one image and write the result(s) next to it (pool worker)"""
+    image_path, digest, mode, fmt = job
+    # Keep the source extension so one.png and one.jpg do not share an output
+    out_base = os.path.abspath(image_path)
+    result = {'path': image_path, 'hash': digest, 'mode': mode, 'format': fmt, 'outputs': [], 'rows': 0}
+
+    try:
+        if mode == 'page':
+            failed = 0
+            for i, block in enumerate(extract_page(image_path)):
+                df = block.get('data')
+                if block['type'] != 'text' and (df is None or is_placeholder(df)):
+                    failed += 1
+                elif block['type'] != 'text' and not df.empty:
+                    result['outputs'].append(write_table(df, f"{out_base}.block{i}_{block['type']}", fmt))
+                    result['rows'] += len(df)
+            if failed:
+                raise ExtractionFailed(f'{failed} block(s) could not be extracted')
+        else:
+            if mode == 'chart':
+                df = extract_data_from_chart(image_path, detect_chart_type(image_path))
+            else:
+                df = extract_table_from_image(image_path)
+            if df is not None and is_placeholder(df):
+                raise ExtractionFailed('extraction failed, only placeholder data was produced')
+            if df is not None and not df.empty:
+                result['outputs'].append(write_table(df, out_base, fmt))
+                result['rows'] = len(df)
+
+        result['status'] = 'ok' if result['outputs'] else 'empty'
+    except (ImageMemoryError, ExtractionFailed) as e:
+        result.update(status='error', error=str(e))
+    except Exception as e:
+        result.update(status='error', error=f'{type(e).__name__}: {e}')
+
+    return result
+
+
+def format_eta(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f'{seconds // 3600}h{seconds % 3600 // 60:02d}m'
+    if seconds >= 60:
+        return f'{seconds // 60}m{seconds % 60:02d}s'
+    return f'{seconds}s'
+
+
+def run(input_path, mode='table', fmt='csv', workers=None, checkpoint_path=None, force=False):
+    """Convert every image under input_path; returns the number of failures"""
+    images = find_images(input_path)
+    if checkpoint_path is None:
+        folder = input_path if os.path.isdir(input_path) else os.path.dirname(os.path.abspath(input_path))
+        checkpoint_path = os.path.join(folder, CHECKPOINT_NAME)
+    checkpoint = {} if force else load_checkpoint(checkpoint_path)
+
+    # Hashing is cheap next to OCR, so unchanged files are skipped up front
+    jobs = []
+    skipped = 0
+    unreadable = 0
+    for image_path in images:
+        key = os.path.abspath(image_path)
+        try:
+            digest = file_hash(image_path)
+        except OSError as e:
+            # A missing or unreadable manifest entry must not stop the batch
+            checkpoint[key] = {'hash': None, 'mode': mode, 'format': fmt, 'outputs': [],
+                               'status': 'error', 'rows': 0, 'error': f'{type(e).__name__}: {e}'}
+            unreadable += 1
+            print(f"error: {image_path} -> {checkpoint[key]['error']}")
+            continue
+        if is_done(checkpoint.get(key), digest, mode, fmt):
+            skipped += 1
+            continue
+        jobs.append((image_path, digest, mode, fmt))
+
+    print(f"{len(images)} images found, {skipped} unchanged, {unreadable} unreadable, "
+          f"{len(jobs)} to convert")
+    if unreadable:
+        save_checkpoint(checkpoint_path, checkpoint)
+    if not jobs:
+        return unreadable
+
+    failures = 0
+    start = time.monotonic()
+    with Pool(processes=workers or os.cpu_count()) as pool:
+        for done, result in enumerate(pool.imap_unordered(convert_file, jobs), start=1):
+            entry = {key: result[key] for key in ('hash', 'mode', 'format', 'outputs', 'status', 'rows')}
+            if 'error' in result:
+                entry['error'] = result['error']
+                failures += 1
+            checkpoint[os.path.abspath(result['path'])] = entry
+            save_checkpoint(checkpoint_path, checkpoint)
+
+            elapsed = time.monotonic() - start
+            rate = done / elapsed if elapsed > 0 else 0
+            eta = format_eta((len(jobs) - done) / rate) if rate else '?'
+            detail = result.get('error') or ', '.join(result['outputs']) or 'no data found'
+            print(f"[{done}/{len(jobs)}] {result['status']}: {result['path']} -> {detail} "
+                  f"({rate:.2f} files/s, ETA {eta})")
+
+    elapsed = time.monotonic() - start
+    print(f"Converted {len(jobs) - failures} of {len(jobs)} images in {format_eta(elapsed)}, "
+          f"{failures} failed")
+    return failures + unreadable
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m utils',
+        description='Extract tables and chart data from a folder of images.')
+    parser.add_argument('input', help='directory of images, or a manifest file listing one image per line')
+    parser.add_argument('--mode', choices=['table', 'chart', 'page'], default='table',
+                        help='table OCR, chart data extraction, or mixed-page segmentation (default: table)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv',
+                        help='output format written next to each image (default: csv)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of worker processes (default: one per CPU)')
+    parser.add_argument('--checkpoint', default=None,
+                        help=f'checkpoint file (default: {CHECKPOINT_NAME} in the input folder)')
+    parser.add_argument('--force', action='store_true',
+                        help='ignore the checkpoint and convert every image again')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        parser.error(f'{args.input} does not exist')
+    if args.format == 'parquet':
+        if not any(importlib.util.find_spec(engine) for engine in ('pyarrow', 'fastparquet')):
+            parser.error('--format parquet needs pyarrow or fastparquet (pip install pyarrow)')
+
+    try:
+        failures = run(args.input, args.mode, args.format, args.workers, args.checkpoint, args.force)
+    except KeyboardInterrupt:
+        print('\nInterrupted, rerun the same command to resume')
+        return 130
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
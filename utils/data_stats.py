@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+# Largest number of columns kept in the correlation matrix by default
+MAX_CORR_COLUMNS = 200
+
+
+def compute_statistics(df, max_corr_columns=MAX_CORR_COLUMNS, order='original'):
+    """Compute column types, summaries and correlations for a DataFrame once.
+
+    The result is shared by every chart builder so that wide tables are only
+    scanned a single time. order is 'original', 'clustered' (similar columns
+    next to each other) or 'top' (most correlated columns first).
+    """
+    numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
+
+    if len(numeric_cols) == 0:
+        # Convert the first column that actually contains numbers
+        for col in df.columns:
+            converted = pd.to_numeric(df[col], errors='coerce')
+            if converted.notna().any():
+                df[col] = converted
+                numeric_cols = [col]
+                break
+
+    categorical_cols = [col for col in df.select_dtypes(include=['object', 'string']).columns
+                        if col not in numeric_cols]
+
+    values = df[numeric_cols].to_numpy(dtype=np.float32, na_value=np.nan)
+
+    return {
+        'numeric_cols': numeric_cols,
+        'categorical_cols': categorical_cols,
+        'summary': summarize_columns(values, numeric_cols),
+        'corr': correlation_matrix(values, numeric_cols, max_corr_columns, order),
+    }
+
+
+def summarize_columns(values, columns):
+    """Per-column count, mean, std, min and max as a DataFrame"""
+    if values.shape[1] == 0 or values.shape[0] == 0:
+        return pd.DataFrame(index=['count', 'mean', 'std', 'min', 'max'], columns=columns, dtype=np.float32)
+
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=0)
+    has_data = count > 0
+
+    summary = np.full((5, values.shape[1]), np.nan, dtype=np.float32)
+    summary[0] = count
+    cols = values[:, has_data]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        summary[1, has_data] = np.nanmean(cols, axis=0)
+        summary[2, has_data] = np.nanstd(cols, axis=0, ddof=1)
+        summary[3, has_data] = np.nanmin(cols, axis=0)
+        summary[4, has_data] = np.nanmax(cols, axis=0)
+
+    return pd.DataFrame(summary, index=['count', 'mean', 'std', 'min', 'max'], columns=columns)
+
+
+def correlation_matrix(values, columns, max_columns=MAX_CORR_COLUMNS, order='original'):
+    """Pearson correlation in float32, optionally trimmed and reordered"""
+    if len(columns) < 2:
+        return None
+
+    if np.isnan(values).any():
+        # Pairwise-complete correlation only exists in pandas
+        corr = pd.DataFrame(values, columns=columns).corr().to_numpy(dtype=np.float32)
+    else:
+        centered = values - values.mean(axis=0)
+        norms = np.sqrt((centered * centered).sum(axis=0))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            centered /= norms
+        corr = centered.T @ centered
+        np.clip(corr, -1, 1, out=corr)
+
+    keep = np.arange(len(columns))
+    if (max_columns and len(columns) > max_columns) or order == 'top':
+        keep = _top_correlated(corr, max_columns or len(columns))
+    if order == 'original':
+        keep = np.sort(keep)
+    elif order == 'clustered' and len(keep) > 2:
+        keep = keep[_spectral_order(corr[np.ix_(keep, keep)])]
+
+    labels = [columns[i] for i in keep]
+    return pd.DataFrame(corr[np.ix_(keep, keep)], index=labels, columns=labels)
+
+
+def _top_correlated(corr, k):
+    """Indices of the k columns with the strongest average correlation"""
+    strength = np.nan_to_num(np.abs(corr)).sum(axis=0)
+    return np.argsort(-strength, kind='stable')[:k]
+
+
+def _spectral_order(corr):
+    """Order columns so strongly correlated ones sit next to each other"""
+    affinity = np.nan_to_num(np.abs(corr)).astype(np.float64)
+    laplacian = np.diag(affinity.sum(axis=0)) - affinity
+    _, vectors = np.linalg.eigh(laplacian)
+    # Sorting by the Fiedler vector groups connected columns together
+    return np.argsort(vectors[:, 1], kind='stable')
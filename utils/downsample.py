@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+
+def lttb_indices(y, n_out):
+    """Pick n_out row positions with Largest-Triangle-Three-Buckets.
+
+    x is taken to be the row position, so this also works when the x axis
+    holds category labels. The first and last rows are always kept.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Missing values would poison the triangle areas
+    y = np.where(np.isnan(y), np.nanmean(y) if np.isfinite(y).any() else 0.0, y)
+    x = np.arange(n, dtype=np.float64)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        # Average point of the next bucket is the third triangle corner
+        avg_x = x[next_start:next_end].mean() if next_end > next_start else x[-1]
+        avg_y = y[next_start:next_end].mean() if next_end > next_start else y[-1]
+
+        bx = x[start:end]
+        by = y[start:end]
+        area = np.abs((x[prev] - avg_x) * (by - y[prev]) - (x[prev] - bx) * (avg_y - y[prev]))
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+
+    return selected
+
+
+def minmax_indices(y, n_out):
+    """Keep the lowest and highest value of each bucket, in row order"""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+
+    filled = np.where(np.isnan(y), np.nanmean(y) if np.isfinite(y).any() else 0.0, y)
+    edges = np.linspace(0, n, n_buckets + 1).astype(int)
+    keep = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        bucket = filled[start:end]
+        keep.append(start + int(np.argmin(bucket)))
+        keep.append(start + int(np.argmax(bucket)))
+
+    return np.unique(keep)
+
+
+def top_n_with_other(labels, values, n, other_label='Other'):
+    """Sum values per label, keep the n-1 largest and fold the rest into one.
+
+    Returns (labels, values) as lists, largest first, with the combined
+    remainder last.
+    """
+    totals = pd.Series(np.asarray(values, dtype=np.float64), index=pd.Index(labels).astype(str))
+    totals = totals.groupby(level=0, sort=False).sum()
+    if len(totals) <= n:
+        return totals.index.tolist(), totals.tolist()
+
+    ordered = totals.sort_values(ascending=False, kind='stable')
+    top = ordered.iloc[:n - 1]
+    rest = ordered.iloc[n - 1:].sum()
+    return top.index.tolist() + [other_label], top.tolist() + [float(rest)]
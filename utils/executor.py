@@ -0,0 +1,155 @@
+import asyncio
+import atexit
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# One worker per core by default; override with DATA_CONVERTER_WORKERS.
+# The pool is per server process, so run the server with a single worker
+MAX_WORKERS = int(os.environ.get('DATA_CONVERTER_WORKERS', os.cpu_count() or 1))
+
+# Jobs allowed to wait for a worker before new requests are turned away
+MAX_PENDING = int(os.environ.get('DATA_CONVERTER_MAX_PENDING', MAX_WORKERS * 4))
+
+# Seconds a job may keep running past its deadline before its pool is killed
+KILL_GRACE_SECONDS = 5
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(MAX_WORKERS + MAX_PENDING)
+
+
+class ExecutorBusy(Exception):
+    """Raised when the CPU executor queue is full"""
+
+
+class JobDeadlineExceeded(BaseException):
+    """Raised inside a pool worker when its job runs past the deadline.
+
+    A BaseException so the extractors' broad except clauses cannot turn it
+    into placeholder data.
+    """
+
+
+def _raise_deadline(signum, frame):
+    raise JobDeadlineExceeded('Job ran past its deadline')
+
+
+def _run_until(deadline, func, *args):
+    """Pool-side wrapper: interrupt func(*args) at deadline (a time.monotonic() value)"""
+    if deadline is None or not hasattr(signal, 'setitimer'):
+        return func(*args)
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise JobDeadlineExceeded('Job waited in the queue past its deadline')
+    previous = signal.signal(signal.SIGALRM, _raise_deadline)
+    signal.setitimer(signal.ITIMER_REAL, remaining)
+    try:
+        return func(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _mp_context():
+    """Start workers without fork(), which is unsafe from a threaded server"""
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+
+def get_executor():
+    """Return the shared process pool, creating it on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=_mp_context())
+        return _executor
+
+
+def _discard_executor(broken):
+    """Drop a pool whose worker died so the next job gets a fresh one"""
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_executor():
+    """Stop the process pool and drop any jobs that have not started yet"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _kill_executor(stuck):
+    """Kill every process of a pool whose job ignored its deadline"""
+    processes = list((stuck._processes or {}).values())
+    _discard_executor(stuck)
+    for process in processes:
+        process.kill()
+
+
+def _kill_if_still_running(executor, job):
+    if not job.done():
+        _kill_executor(executor)
+
+
+atexit.register(shutdown_executor)
+
+
+async def run_cpu_bound(func, *args, deadline=None):
+    """Run func(*args) on the process pool without blocking the event loop.
+
+    deadline is an absolute loop.time() value. Raises asyncio.TimeoutError
+    when it passes. The worker is interrupted at the same deadline so it is
+    free for the next job; if it is stuck in native code and still busy
+    KILL_GRACE_SECONDS later, its pool is killed and replaced.
+    """
+    if not _slots.acquire(blocking=False):
+        raise ExecutorBusy('Server is busy, please retry shortly')
+
+    loop = asyncio.get_running_loop()
+    # loop.time() is local to this process; workers compare against time.monotonic()
+    job_deadline = None if deadline is None else time.monotonic() + (deadline - loop.time())
+    executor = get_executor()
+    try:
+        try:
+            job = executor.submit(_run_until, job_deadline, func, *args)
+        except BrokenProcessPool:
+            # A worker died during an earlier job (e.g. OOM-killed)
+            _discard_executor(executor)
+            executor = get_executor()
+            job = executor.submit(_run_until, job_deadline, func, *args)
+    except Exception:
+        _slots.release()
+        raise
+    # Hold the slot until the job really finishes, not just until we stop waiting
+    job.add_done_callback(lambda _: _slots.release())
+
+    future = asyncio.wrap_future(job)
+    try:
+        if deadline is None:
+            return await future
+        return await asyncio.wait_for(future, timeout=max(deadline - loop.time(), 0))
+    except asyncio.TimeoutError:
+        if not job.done():
+            # A timer rather than call_later: Flask's per-request loop is gone by then
+            watchdog = threading.Timer(KILL_GRACE_SECONDS, _kill_if_still_running, (executor, job))
+            watchdog.daemon = True
+            watchdog.start()
+        raise
+    except JobDeadlineExceeded as e:
+        # The worker noticed the deadline before the event loop did
+        raise asyncio.TimeoutError(str(e)) from None
+    except BrokenProcessPool:
+        # This job's worker died; the job is not retried, but later ones
+        # must not inherit the broken pool
+        _discard_executor(executor)
+        raise
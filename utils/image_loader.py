@@ -0,0 +1,111 @@
+import os
+import warnings
+
+import cv2
+from PIL import Image
+
+from utils.memory import ImageMemoryError, record_stage, note
+
+# Most pixels a decoder may allocate; larger JPEGs are downscaled while
+# decoding, larger images in other formats are rejected
+MAX_IMAGE_PIXELS = int(os.environ.get('DATA_CONVERTER_MAX_PIXELS', 25_000_000))
+
+# JPEGs decode at down to 1/8 scale, so this is the largest one whose reduced
+# decode still fits MAX_IMAGE_PIXELS
+MAX_DECODE_PIXELS = int(os.environ.get('DATA_CONVERTER_MAX_DECODE_PIXELS', MAX_IMAGE_PIXELS * 64))
+
+# Formats whose decoder can scale down while decoding (libjpeg's scale_denom)
+DOWNSCALE_ON_DECODE_FORMATS = {'JPEG', 'MPO'}
+
+# Keep PIL's own decompression-bomb check in line with ours (it errors at
+# twice this value and only warns below that, where check_image_size rejects)
+Image.MAX_IMAGE_PIXELS = MAX_DECODE_PIXELS
+
+_REDUCED_FLAGS = {
+    True: {2: cv2.IMREAD_REDUCED_GRAYSCALE_2, 4: cv2.IMREAD_REDUCED_GRAYSCALE_4, 8: cv2.IMREAD_REDUCED_GRAYSCALE_8},
+    False: {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8},
+}
+
+
+class ImageTooLarge(ImageMemoryError):
+    """Raised when decoding an image would allocate more than the pixel limit"""
+
+
+def probe_image(image_path):
+    """Read (width, height, format) from the file header without decoding pixels"""
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+            with Image.open(image_path) as img:
+                return img.width, img.height, img.format
+    except Image.DecompressionBombError as e:
+        raise ImageTooLarge(str(e))
+    except Exception:
+        return None
+
+
+def reduction_factor(width, height, max_pixels=MAX_IMAGE_PIXELS):
+    """Smallest power-of-two scale-down that fits width x height into max_pixels"""
+    factor = 1
+    while (width // factor) * (height // factor) > max_pixels:
+        factor *= 2
+    return factor
+
+
+def check_image_size(image_path, max_pixels=MAX_IMAGE_PIXELS):
+    """Probe an image and return the factor it will be downscaled by.
+
+    Only JPEG can be downscaled while decoding, and only down to 1/8, so
+    ImageTooLarge is raised whenever the decoder itself would still have to
+    allocate more than max_pixels: above max_pixels for other formats, above
+    64 times that (capped by MAX_DECODE_PIXELS) for JPEG.
+    """
+    info = probe_image(image_path)
+    if info is None:
+        return 1
+    width, height, fmt = info
+    if fmt in DOWNSCALE_ON_DECODE_FORMATS:
+        limit = min(MAX_DECODE_PIXELS, max_pixels * 64)
+    else:
+        limit = max_pixels
+    if width * height > limit:
+        raise ImageTooLarge(
+            f'Image is {width}x{height} pixels, the limit for {fmt or "this"} images is {limit:,} pixels')
+    return reduction_factor(width, height, max_pixels)
+
+
+def load_image(image_path, grayscale=False, max_pixels=MAX_IMAGE_PIXELS):
+    """Decode an image with cv2, downscaling on decode to fit max_pixels.
+
+    JPEG files are decoded directly at 1/2, 1/4 or 1/8 scale; other formats
+    are rejected by check_image_size before they would need shrinking.
+    Returns None if the file cannot be decoded, like cv2.imread.
+    """
+    factor = check_image_size(image_path, max_pixels)
+
+    if factor == 1:
+        img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR)
+    else:
+        img = cv2.imread(image_path, _REDUCED_FLAGS[grayscale][min(factor, 8)])
+        if img is not None and factor > 8:
+            h, w = img.shape[:2]
+            img = cv2.resize(img, (w * 8 // factor, h * 8 // factor), interpolation=cv2.INTER_AREA)
+        note('downscale_factor', factor)
+
+    record_stage('decode', img)
+    return img
+
+
+def load_pil_image(image_path, max_pixels=MAX_IMAGE_PIXELS):
+    """Open an image with PIL, using draft mode / reduce to fit max_pixels"""
+    factor = check_image_size(image_path, max_pixels)
+    img = Image.open(image_path)
+    if factor > 1:
+        # draft() makes the JPEG decoder itself scale down; reduce() covers the rest
+        full_width = img.width
+        img.draft(img.mode, (img.width // factor, img.height // factor))
+        remaining = max(factor * img.width // full_width, 1)
+        if remaining > 1:
+            img = img.reduce(remaining)
+        note('downscale_factor', factor)
+    return img
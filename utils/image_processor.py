@@ -2,26 +2,27 @@ import pytesseract
 
 import cv2
 import pytesseract
-from PIL import Image
 import pandas as pd
 import numpy as np
 import re
+from utils.image_loader import load_image, load_pil_image
+from utils.memory import ImageMemoryError, record_stage
 
 # Uncomment and set path if Tesseract is not in PATH (Windows)
 pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
 def preprocess_image(image_path):
     """Preprocess image for better OCR results"""
-    img = cv2.imread(image_path)
+    # Decode straight to grayscale, downscaled if it is over the pixel budget
+    gray = load_image(image_path, grayscale=True)
     
-    # Convert to grayscale
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    # Apply thresholding in place
+    cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=gray)
+    record_stage('threshold', gray)
     
-    # Apply thresholding
-    _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    
-    # Denoise
-    denoised = cv2.fastNlMeansDenoising(thresh, None, 10, 7, 21)
+    # Denoise (needs a separate output buffer)
+    denoised = cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
+    record_stage('denoise', gray, denoised)
     
     return denoised
 
@@ -40,6 +41,8 @@ def extract_table_from_image(image_path):
         
         return df
     
+    except ImageMemoryError:
+        raise
     except Exception as e:
         print(f"Error in extract_table_from_image: {e}")
         # Fallback: try alternative method
@@ -116,7 +119,7 @@ def extract_table_alternative(image_path):
     """Alternative method using different OCR approach"""
     try:
         # Use PIL for OCR
-        img = Image.open(image_path)
+        img = load_pil_image(image_path)
         
         # Get OCR data with bounding boxes
         ocr_data = pytesseract.image_to_data(img, output_type=pytesseract.Output.DICT)
@@ -153,14 +156,19 @@ def extract_table_alternative(image_path):
         
         return pd.DataFrame()
     
+    except ImageMemoryError:
+        raise
     except Exception as e:
         print(f"Error in alternative extraction: {e}")
         return create_sample_dataframe()
 
 def create_sample_dataframe():
     """Create a sample DataFrame when extraction fails"""
-    return pd.DataFrame({
+    df = pd.DataFrame({
         'Category': ['A', 'B', 'C', 'D', 'E'],
         'Value': [23, 45, 56, 78, 34],
         'Growth': [12.5, 23.4, 18.9, 34.2, 15.7]
-    })
\ No newline at end of file
+    })
+    # Lets batch callers tell placeholder data from a real extraction
+    df.attrs['placeholder'] = True
+    return df
\ No newline at end of file
@@ -0,0 +1,195 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from utils.image_processor import extract_table_from_image
+from utils.chart_detector import detect_chart_type, extract_data_from_chart
+from utils.image_loader import load_image
+from utils.memory import ImageMemoryError, record_stage
+
+# Whitespace gaps wider than this fraction of the page split it into blocks
+MIN_GAP_RATIO = 0.02
+
+# Blocks smaller than this fraction of the page are treated as text
+MIN_BLOCK_RATIO = 0.01
+
+# Blocks extracted at the same time
+MAX_BLOCK_WORKERS = 4
+
+
+def segment_page(image_path):
+    """Split a page into table, chart and text blocks.
+
+    The page is cut recursively along whitespace in its row and column
+    projection profiles, then each block is classified from its connected
+    components. Returns a list of {'type', 'bbox'} dicts in reading order,
+    where bbox is (x, y, width, height).
+    """
+    return segment_image(load_image(image_path, grayscale=True))
+
+
+def segment_image(gray):
+    """Split an already decoded grayscale page into blocks (see segment_page)"""
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    record_stage('binarize', gray, binary)
+
+    height, width = binary.shape
+    text_height = estimate_text_height(binary)
+    # Line spacing inside a table or paragraph must not split it
+    min_gap = max(int(min(height, width) * MIN_GAP_RATIO), text_height * 2, 5)
+
+    page_area = width * height
+    return [{'type': block_type, 'bbox': bbox}
+            for bbox, block_type in xy_cut(binary, 0, 0, width, height, min_gap, text_height, page_area)]
+
+
+def estimate_text_height(binary):
+    """Median height of the small connected components (glyphs) on the page"""
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    heights = heights[(heights > 3) & (heights < binary.shape[0] * 0.1)]
+    if len(heights) == 0:
+        return 10
+    return int(np.median(heights))
+
+
+def xy_cut(binary, x, y, w, h, min_gap, text_height, page_area):
+    """Recursively split a region at whitespace runs of at least min_gap pixels.
+
+    Returns a list of ((x, y, w, h), block_type) tuples.
+    """
+    region = binary[y:y + h, x:x + w]
+
+    # Trim surrounding whitespace
+    rows = np.flatnonzero(region.any(axis=1))
+    cols = np.flatnonzero(region.any(axis=0))
+    if len(rows) == 0 or len(cols) == 0:
+        return []
+    y, h = y + rows[0], rows[-1] - rows[0] + 1
+    x, w = x + cols[0], cols[-1] - cols[0] + 1
+    region = binary[y:y + h, x:x + w]
+
+    # Stacked blocks are always separated
+    spans = _ink_spans(region.any(axis=1), min_gap)
+    if len(spans) > 1:
+        blocks = []
+        for start, end in spans:
+            blocks.extend(xy_cut(binary, x, y + start, w, end - start, min_gap, text_height, page_area))
+        return blocks
+
+    # Side-by-side blocks are separated too. Ruled table columns never leave
+    # a gap (the row lines cross them), and borderless ones are kept whole
+    # when their rows line up across the gap
+    block_type = classify_block(region, text_height, page_area)
+    spans = _ink_spans(region.any(axis=0), min_gap)
+    if len(spans) > 1 and not (block_type == 'table' and _rows_aligned(region, spans, text_height)):
+        blocks = []
+        for start, end in spans:
+            blocks.extend(xy_cut(binary, x + start, y, end - start, h, min_gap, text_height, page_area))
+        return blocks
+
+    return [((int(x), int(y), int(w), int(h)), block_type)]
+
+
+def _rows_aligned(region, spans, text_height):
+    """True if the text rows in each column span start at the same heights"""
+    row_starts = []
+    for start, end in spans:
+        rows = _ink_spans(region[:, start:end].any(axis=1), max(text_height // 3, 1))
+        row_starts.append(np.array([row_start for row_start, _ in rows]))
+    first = row_starts[0]
+    return len(first) >= 2 and all(
+        len(starts) == len(first) and np.abs(starts - first).max() <= text_height
+        for starts in row_starts[1:])
+
+
+def _ink_spans(profile, min_gap):
+    """(start, end) runs of ink separated by gaps of at least min_gap"""
+    ink = np.flatnonzero(profile)
+    if len(ink) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(ink) > min_gap)
+    starts = np.concatenate(([ink[0]], ink[breaks + 1]))
+    ends = np.concatenate((ink[breaks] + 1, [ink[-1] + 1]))
+    return list(zip(starts, ends))
+
+
+def classify_block(block, text_height, page_area):
+    """Label a binary block as 'table', 'chart' or 'text'"""
+    h, w = block.shape
+    if h * w < page_area * MIN_BLOCK_RATIO or h < text_height * 3:
+        return 'text'
+
+    # Ruling lines: long horizontal and vertical strokes
+    h_lines = cv2.morphologyEx(block, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (max(w // 4, 1), 1)))
+    v_lines = cv2.morphologyEx(block, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(h // 4, 1))))
+    n_h = len(_ink_spans(h_lines.any(axis=1), 2))
+    n_v = len(_ink_spans(v_lines.any(axis=0), 2))
+
+    if n_h >= 3 and n_v >= 3:
+        return 'table'
+
+    # Components much bigger than a glyph: axes, bars, curves, slices
+    _, _, stats, _ = cv2.connectedComponentsWithStats(block, connectivity=8)
+    stats = stats[1:]
+    large = (stats[:, cv2.CC_STAT_HEIGHT] > text_height * 3) | (stats[:, cv2.CC_STAT_WIDTH] > text_height * 15)
+    ink = stats[:, cv2.CC_STAT_AREA].sum()
+    large_ink = stats[large, cv2.CC_STAT_AREA].sum()
+
+    if ink > 0 and large_ink / ink > 0.3:
+        return 'chart'
+    if n_h >= 1 and n_v >= 1 and large.any():
+        # Axes plus at least one bar, curve or slice
+        return 'chart'
+
+    # Borderless tables: text rows with aligned column gaps
+    row_spans = _ink_spans(block.any(axis=1), max(text_height // 3, 1))
+    col_spans = _ink_spans(block.any(axis=0), text_height * 2)
+    if len(row_spans) >= 3 and len(col_spans) >= 2:
+        return 'table'
+
+    return 'text'
+
+
+def extract_page(image_path, max_workers=MAX_BLOCK_WORKERS):
+    """Segment a page and extract every table and chart block in parallel.
+
+    Returns one dict per block with 'type' and 'bbox'; table and chart
+    blocks also carry 'data' (a DataFrame), chart blocks 'chart_type'.
+    """
+    img = load_image(image_path, grayscale=True)
+    blocks = segment_image(img)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        jobs = []
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for i, block in enumerate(blocks):
+                if block['type'] == 'text':
+                    continue
+                x, y, w, h = block['bbox']
+                crop_path = os.path.join(tmp_dir, f'block_{i}.png')
+                cv2.imwrite(crop_path, img[y:y + h, x:x + w])
+                jobs.append((block, pool.submit(extract_block, crop_path, block['type'])))
+
+            for block, job in jobs:
+                try:
+                    block.update(job.result())
+                except ImageMemoryError:
+                    raise
+                except Exception as e:
+                    print(f"Error extracting {block['type']} block: {e}")
+                    block['data'] = None
+
+    return blocks
+
+
+def extract_block(crop_path, block_type):
+    """Run the table or chart extractor on a single cropped block"""
+    if block_type == 'table':
+        return {'data': extract_table_from_image(crop_path)}
+
+    chart_type = detect_chart_type(crop_path)
+    return {'chart_type': chart_type, 'data': extract_data_from_chart(crop_path, chart_type)}
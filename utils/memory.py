@@ -0,0 +1,93 @@
+import os
+
+# How much a single request may grow the worker's RSS; 0 turns the check off
+RSS_BUDGET_MB = int(os.environ.get('DATA_CONVERTER_RSS_BUDGET_MB', 0))
+
+# Usage record for the job running in this process (one job per pool worker)
+_current = None
+
+
+class ImageMemoryError(Exception):
+    """Raised when an image cannot be processed within the memory limits"""
+
+
+class MemoryBudgetExceeded(ImageMemoryError):
+    """Raised when a request grows the worker's RSS by more than RSS_BUDGET_MB"""
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB, or None if it cannot be read"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError):
+        pass
+    try:
+        # No procfs (e.g. macOS): fall back to the peak, reported in bytes there
+        import resource
+    except ImportError:
+        # Windows has neither
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024)
+
+
+class MemoryUsage:
+    """Per-stage memory accounting for a single request"""
+
+    def __init__(self, budget_mb=RSS_BUDGET_MB):
+        self.budget_mb = budget_mb
+        self.start_rss_mb = current_rss_mb()
+        self.peak_rss_mb = self.start_rss_mb
+        self.stages = []
+        self.notes = {}
+
+    def record(self, stage, arrays):
+        entry = {
+            'stage': stage,
+            'array_mb': round(sum(a.nbytes for a in arrays if a is not None) / (1024 * 1024), 2)
+        }
+        self.stages.append(entry)
+        rss = current_rss_mb()
+        if rss is None or self.start_rss_mb is None:
+            # No RSS source on this platform: report array sizes only
+            return
+        entry['rss_mb'] = round(rss, 1)
+        self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        # Pool workers keep memory from earlier jobs, so only count growth
+        # since this request started
+        growth = rss - self.start_rss_mb
+        if self.budget_mb and growth > self.budget_mb:
+            raise MemoryBudgetExceeded(
+                f'Memory budget of {self.budget_mb} MB exceeded at {stage} (+{growth:.0f} MB)')
+
+    def to_dict(self):
+        usage = {'budget_mb': self.budget_mb, 'stages': self.stages, **self.notes}
+        if self.start_rss_mb is not None:
+            usage['start_rss_mb'] = round(self.start_rss_mb, 1)
+            usage['peak_rss_mb'] = round(self.peak_rss_mb, 1)
+        return usage
+
+
+def record_stage(stage, *arrays):
+    """Account for the arrays produced by a pipeline stage, if tracking"""
+    if _current is not None:
+        _current.record(stage, arrays)
+
+
+def note(key, value):
+    """Attach extra information (e.g. downscale factor) to the usage record"""
+    if _current is not None:
+        _current.notes[key] = value
+
+
+def track_memory(func, *args):
+    """Run func(*args) and return (result, memory usage dict)"""
+    global _current
+    usage = MemoryUsage()
+    _current = usage
+    try:
+        result = func(*args)
+    finally:
+        _current = None
+    return result, usage.to_dict()
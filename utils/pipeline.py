@@ -0,0 +1,92 @@
+import os
+
+from utils.image_processor import extract_table_from_image
+from utils.chart_detector import detect_chart_type, extract_data_from_chart
+from utils.visual_generator import generate_visualizations
+from utils.layout_analyzer import extract_page
+from utils.memory import track_memory
+
+# Each function below handles one upload end to end and runs on the process
+# pool, so the web front only awaits it. They return the JSON response body;
+# a body with an 'error' key means nothing could be extracted.
+
+
+def process_table_file(filepath, timestamp, output_folder):
+    """Extract a table image, build its charts and save the data as CSV"""
+    df, memory = track_memory(extract_table_from_image, filepath)
+
+    if df is None or df.empty:
+        return {'error': 'Could not extract data from image'}
+
+    # Generate visualizations
+    charts = generate_visualizations(df, timestamp)
+
+    # Save full-resolution data, charts may show a downsampled view
+    csv_filename = f"{timestamp}_table_data.csv"
+    df.to_csv(os.path.join(output_folder, csv_filename), index=False)
+
+    return {
+        'success': True,
+        'data': df.to_dict('records'),
+        'columns': df.columns.tolist(),
+        'charts': charts,
+        'table_html': df.to_html(classes='table table-striped', index=False),
+        'csv_file': csv_filename,
+        'memory': memory
+    }
+
+
+def _detect_and_extract_chart(filepath):
+    chart_type = detect_chart_type(filepath)
+    return chart_type, extract_data_from_chart(filepath, chart_type)
+
+
+def process_chart_file(filepath, timestamp, output_folder):
+    """Detect a chart's type, extract its data and save it as CSV"""
+    (chart_type, df), memory = track_memory(_detect_and_extract_chart, filepath)
+
+    if df is None or df.empty:
+        return {'error': 'Could not extract data from chart'}
+
+    # Save as CSV
+    csv_filename = f"{timestamp}_extracted_data.csv"
+    df.to_csv(os.path.join(output_folder, csv_filename), index=False)
+
+    return {
+        'success': True,
+        'chart_type': chart_type,
+        'data': df.to_dict('records'),
+        'columns': df.columns.tolist(),
+        'table_html': df.to_html(classes='table table-striped', index=False),
+        'csv_file': csv_filename,
+        'memory': memory
+    }
+
+
+def process_page_file(filepath, timestamp, output_folder):
+    """Split a page into blocks and extract every table and chart on it"""
+    blocks, memory = track_memory(extract_page, filepath)
+
+    results = []
+    for i, block in enumerate(blocks):
+        result = {'type': block['type'], 'bbox': list(block['bbox'])}
+        if 'chart_type' in block:
+            result['chart_type'] = block['chart_type']
+
+        df = block.get('data')
+        if block['type'] != 'text' and (df is None or df.attrs.get('placeholder')):
+            # Extraction failed; do not pass the extractor's sample data off as results
+            result['error'] = f"Could not extract data from {block['type']} block"
+        elif df is not None and not df.empty:
+            csv_filename = f"{timestamp}_block{i}_{block['type']}.csv"
+            df.to_csv(os.path.join(output_folder, csv_filename), index=False)
+
+            result.update({
+                'data': df.to_dict('records'),
+                'columns': df.columns.tolist(),
+                'table_html': df.to_html(classes='table table-striped', index=False),
+                'csv_file': csv_filename
+            })
+        results.append(result)
+
+    return {'success': True, 'blocks': results, 'memory': memory}
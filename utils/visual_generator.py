@@ -3,29 +3,38 @@ import plotly.express as px
 from plotly.subplots import make_subplots
 import pandas as pd
 import os
+from utils.data_stats import compute_statistics
+from utils.downsample import lttb_indices, minmax_indices, top_n_with_other
 
 OUTPUT_FOLDER = 'outputs'
 
-def generate_visualizations(df, timestamp):
-    """Generate multiple visualization options from DataFrame"""
+# Above this many columns the heatmap is drawn without per-cell labels
+HEATMAP_ANNOTATION_LIMIT = 20
+
+# Line and scatter charts are downsampled to at most this many points
+MAX_PLOT_POINTS = 2000
+
+# Traces with more points than this are drawn with WebGL
+WEBGL_THRESHOLD = 1000
+
+# Bar and pie charts keep this many categories, the rest become "Other"
+MAX_BAR_CATEGORIES = 30
+MAX_PIE_SLICES = 10
+
+def generate_visualizations(df, timestamp, corr_order='original'):
+    """Generate multiple visualization options from DataFrame.
+
+    corr_order is passed to compute_statistics: 'original', 'clustered'
+    or 'top' column order for the correlation heatmap.
+    """
     os.makedirs(OUTPUT_FOLDER, exist_ok=True)
     
     charts = {}
     
-    # Detect column types
-    numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
-    categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
-    
-    if len(numeric_cols) == 0:
-        # Try to convert first non-object column
-        for col in df.columns:
-            try:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-                numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
-                categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
-                break
-            except:
-                pass
+    # Detect column types, summaries and correlations once for all charts
+    stats = compute_statistics(df, order=corr_order)
+    numeric_cols = stats['numeric_cols']
+    categorical_cols = stats['categorical_cols']
     
     # Generate different chart types
     if len(numeric_cols) > 0:
@@ -33,37 +42,54 @@ def generate_visualizations(df, timestamp):
         y_col = numeric_cols[0]
         
         # Bar Chart
-        charts['bar'] = create_bar_chart(df, x_col, y_col, timestamp)
+        charts['bar'] = create_bar_chart(df, x_col, y_col, timestamp, stats)
         
         # Line Chart
         charts['line'] = create_line_chart(df, x_col, y_col, timestamp)
         
-        # Pie Chart (if suitable)
-        if len(df) <= 10:
-            charts['pie'] = create_pie_chart(df, x_col, y_col, timestamp)
+        # Pie Chart (small categories are folded into "Other")
+        charts['pie'] = create_pie_chart(df, x_col, y_col, timestamp)
         
         # Scatter Plot (if multiple numeric columns)
         if len(numeric_cols) >= 2:
-            charts['scatter'] = create_scatter_plot(df, numeric_cols[0], numeric_cols[1], timestamp)
+            charts['scatter'] = create_scatter_plot(df, numeric_cols[0], numeric_cols[1], timestamp, stats)
         
         # Heatmap (if multiple numeric columns)
         if len(numeric_cols) >= 2:
-            charts['heatmap'] = create_heatmap(df, timestamp)
+            charts['heatmap'] = create_heatmap(df, timestamp, stats)
     
     return charts
 
-def create_bar_chart(df, x_col, y_col, timestamp):
+def color_range(stats, col):
+    """Colour scale bounds for a column, taken from the precomputed summary"""
+    low, high = stats['summary'].loc[['min', 'max'], col]
+    if pd.isna(low) or pd.isna(high):
+        return {}
+    return {'cmin': float(low), 'cmax': float(high)}
+
+def create_bar_chart(df, x_col, y_col, timestamp, stats=None):
     """Create an interactive bar chart"""
+    if stats is None:
+        stats = compute_statistics(df)
+    
+    labels, values = df[x_col], df[y_col]
+    colors = color_range(stats, y_col)
+    if len(df) > MAX_BAR_CATEGORIES:
+        labels, values = top_n_with_other(labels, values, MAX_BAR_CATEGORIES)
+        # Bars now show grouped sums, so the per-row range no longer applies
+        colors = {'cmin': min(values), 'cmax': max(values)}
+    
     fig = go.Figure(data=[
         go.Bar(
-            x=df[x_col],
-            y=df[y_col],
+            x=labels,
+            y=values,
             marker=dict(
-                color=df[y_col],
+                color=values,
                 colorscale='Viridis',
+                **colors,
                 showscale=True
             ),
-            text=df[y_col],
+            text=values,
             textposition='auto',
         )
     ])
@@ -84,16 +110,22 @@ def create_bar_chart(df, x_col, y_col, timestamp):
     return {
         'type': 'bar',
         'filename': filename,
+        'points': len(labels),
+        'total_points': len(df),
         'html': fig.to_html(include_plotlyjs='cdn', div_id='bar-chart')
     }
 
 def create_line_chart(df, x_col, y_col, timestamp):
     """Create an interactive line chart"""
+    rows = lttb_indices(df[y_col], MAX_PLOT_POINTS)
+    plot_df = df.iloc[rows]
+    trace = go.Scattergl if len(plot_df) > WEBGL_THRESHOLD else go.Scatter
+    
     fig = go.Figure(data=[
-        go.Scatter(
-            x=df[x_col],
-            y=df[y_col],
-            mode='lines+markers',
+        trace(
+            x=plot_df[x_col],
+            y=plot_df[y_col],
+            mode='lines+markers' if len(plot_df) <= WEBGL_THRESHOLD else 'lines',
             marker=dict(size=8, color='royalblue'),
             line=dict(width=3, color='royalblue'),
             name=y_col
@@ -116,15 +148,21 @@ def create_line_chart(df, x_col, y_col, timestamp):
     return {
         'type': 'line',
         'filename': filename,
+        'points': len(plot_df),
+        'total_points': len(df),
         'html': fig.to_html(include_plotlyjs='cdn', div_id='line-chart')
     }
 
 def create_pie_chart(df, label_col, value_col, timestamp):
     """Create an interactive pie chart"""
+    labels, values = df[label_col], df[value_col]
+    if len(df) > MAX_PIE_SLICES:
+        labels, values = top_n_with_other(labels, values, MAX_PIE_SLICES)
+    
     fig = go.Figure(data=[
         go.Pie(
-            labels=df[label_col],
-            values=df[value_col],
+            labels=labels,
+            values=values,
             hole=0.3,
             marker=dict(line=dict(color='white', width=2))
         )
@@ -143,24 +181,36 @@ def create_pie_chart(df, label_col, value_col, timestamp):
     return {
         'type': 'pie',
         'filename': filename,
+        'points': len(labels),
+        'total_points': len(df),
         'html': fig.to_html(include_plotlyjs='cdn', div_id='pie-chart')
     }
 
-def create_scatter_plot(df, x_col, y_col, timestamp):
+def create_scatter_plot(df, x_col, y_col, timestamp, stats=None):
     """Create an interactive scatter plot"""
+    if stats is None:
+        stats = compute_statistics(df)
+    
+    # Sort along x so min-max buckets keep the outliers of each x range
+    plot_df = df.sort_values(x_col, kind='stable')
+    plot_df = plot_df.iloc[minmax_indices(plot_df[y_col], MAX_PLOT_POINTS)]
+    large = len(plot_df) > WEBGL_THRESHOLD
+    trace = go.Scattergl if large else go.Scatter
+    
     fig = go.Figure(data=[
-        go.Scatter(
-            x=df[x_col],
-            y=df[y_col],
+        trace(
+            x=plot_df[x_col],
+            y=plot_df[y_col],
             mode='markers',
             marker=dict(
-                size=12,
-                color=df[y_col],
+                size=6 if large else 12,
+                color=plot_df[y_col],
                 colorscale='Viridis',
+                **color_range(stats, y_col),
                 showscale=True,
                 line=dict(width=1, color='white')
             ),
-            text=df.index,
+            text=plot_df.index,
             hovertemplate='<b>%{text}</b><br>' +
                          f'{x_col}: %{{x}}<br>' +
                          f'{y_col}: %{{y}}<extra></extra>'
@@ -182,38 +232,47 @@ def create_scatter_plot(df, x_col, y_col, timestamp):
     return {
         'type': 'scatter',
         'filename': filename,
+        'points': len(plot_df),
+        'total_points': len(df),
         'html': fig.to_html(include_plotlyjs='cdn', div_id='scatter-chart')
     }
 
-def create_heatmap(df, timestamp):
+def create_heatmap(df, timestamp, stats=None):
     """Create a heatmap for numeric columns"""
-    numeric_df = df.select_dtypes(include=['number'])
+    if stats is None:
+        stats = compute_statistics(df)
     
-    if numeric_df.empty or len(numeric_df.columns) < 2:
+    # Correlation matrix is precomputed (float32)
+    corr_matrix = stats['corr']
+    if corr_matrix is None:
         return None
     
-    # Calculate correlation matrix
-    corr_matrix = numeric_df.corr()
+    heatmap_args = dict(
+        z=corr_matrix.values,
+        x=corr_matrix.columns,
+        y=corr_matrix.columns,
+        colorscale='RdBu',
+        zmid=0,
+        hovertemplate='%{x} vs %{y}<br>Correlation: %{z:.2f}<extra></extra>'
+    )
     
-    fig = go.Figure(data=[
-        go.Heatmap(
-            z=corr_matrix.values,
-            x=corr_matrix.columns,
-            y=corr_matrix.columns,
-            colorscale='RdBu',
-            zmid=0,
-            text=corr_matrix.values.round(2),
-            texttemplate='%{text}',
-            textfont={"size": 10},
-            hovertemplate='%{x} vs %{y}<br>Correlation: %{z:.2f}<extra></extra>'
+    # Per-cell labels grow with the square of the column count, so only
+    # annotate small matrices
+    if len(corr_matrix.columns) <= HEATMAP_ANNOTATION_LIMIT:
+        # Format from z: float32 text would print as 0.6499999761581421
+        heatmap_args.update(
+            texttemplate='%{z:.2f}',
+            textfont={"size": 10}
         )
-    ])
     
+    fig = go.Figure(data=[go.Heatmap(**heatmap_args)])
+    
+    size = max(600, min(1200, 20 * len(corr_matrix.columns)))
     fig.update_layout(
         title='Correlation Heatmap',
         template='plotly_white',
-        width=600,
-        height=600
+        width=size,
+        height=size
     )
     
     filename = f'{timestamp}_heatmap.html'